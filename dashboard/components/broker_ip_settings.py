@@ -1,8 +1,14 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QPushButton, QMessageBox)
 from PyQt5.QtCore import pyqtSignal, Qt
-import json
-import os
+from PyQt5.QtGui import QIntValidator
+import ipaddress
+import re
+from mqtt_settings import load_settings, save_settings
+
+# Compiled once so validation on Save does no regex compilation
+_IP_RE = re.compile(r'^(?:\d{1,3}\.){3}\d{1,3}$')
+_HOSTNAME_RE = re.compile(r'^[A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9_])?(?:\.[A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9_])?)*$')
 
 class BrokerIPDialog(QDialog):
     settings_updated = pyqtSignal(str, int)  # Signal when settings are updated (host, port)
@@ -13,6 +19,9 @@ class BrokerIPDialog(QDialog):
         self.setWindowModality(Qt.ApplicationModal)
         self.setMinimumWidth(350)
         
+        # Values the dialog was opened with, used to skip no-op saves
+        self._initial = (current_host, current_port)
+        
         layout = QVBoxLayout()
         
         # IP Address
@@ -27,6 +36,7 @@ class BrokerIPDialog(QDialog):
         port_layout.addWidget(QLabel("Port:"))
         self.port_edit = QLineEdit(str(current_port))
         self.port_edit.setPlaceholderText("e.g., 1883")
+        self.port_edit.setValidator(QIntValidator(1, 65535, self))
         port_layout.addWidget(self.port_edit)
         
         # Buttons
@@ -56,30 +66,37 @@ class BrokerIPDialog(QDialog):
         if not host:
             QMessageBox.warning(self, "Validation Error", "Broker IP cannot be empty")
             return
+        
+        # Dotted numbers must form a valid IPv4 address, anything with a colon a valid IPv6
+        # address, and anything else a valid hostname
+        if host.replace(".", "").isdigit():
+            valid_host = bool(_IP_RE.match(host)) and all(int(x) <= 255 for x in host.split('.'))
+        elif ":" in host:
+            try:
+                ipaddress.IPv6Address(host)
+                valid_host = True
+            except ValueError:
+                valid_host = False
+        else:
+            valid_host = len(host) <= 253 and bool(_HOSTNAME_RE.match(host))
+        if not valid_host:
+            QMessageBox.warning(self, "Validation Error", "Broker IP must be a valid IP address or hostname")
+            return
             
-        try:
-            port = int(port_str)
-            if not (0 < port <= 65535):
-                raise ValueError("Port out of range")
-        except ValueError:
+        # The validator rejects bad keystrokes, but empty or intermediate values (e.g. "0") can remain
+        port = int(port_str) if port_str.isdigit() else 0
+        if not (0 < port <= 65535):
             QMessageBox.warning(self, "Validation Error", "Port must be a number between 1 and 65535")
             return
         
-        # Save to settings file
-        settings = {
-            "broker_host": host,
-            "broker_port": port
-        }
-        
+        # Save to settings file (skipped when it already holds these values)
         try:
-            config_dir = os.path.join(os.path.expanduser("~"), ".sarayu")
-            os.makedirs(config_dir, exist_ok=True)
-            settings_file = os.path.join(config_dir, "mqtt_settings.json")
+            save_settings(host, port)
             
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f, indent=4)
-                
-            self.settings_updated.emit(host, port)
+            # Only notify (and so trigger an MQTT reconnect) when the values changed
+            if (host, port) != self._initial:
+                self._initial = (host, port)
+                self.settings_updated.emit(host, port)
             self.accept()
             
         except Exception as e:
@@ -88,12 +105,5 @@ class BrokerIPDialog(QDialog):
     @staticmethod
     def load_settings():
         """Load saved broker settings."""
-        try:
-            settings_file = os.path.join(os.path.expanduser("~"), ".sarayu", "mqtt_settings.json")
-            if os.path.exists(settings_file):
-                with open(settings_file, 'r') as f:
-                    settings = json.load(f)
-                    return settings.get("broker_host", ""), settings.get("broker_port", 1883)
-        except Exception:
-            pass
-        return "", 1883  # Default values
+        return load_settings()
+
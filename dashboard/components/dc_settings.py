@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
                             QTableWidgetItem, QHeaderView, QPushButton, 
                             QMessageBox, QMdiSubWindow, QLabel, QLineEdit, QDoubleSpinBox, QApplication)
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 import logging
 import json
 from datetime import datetime
@@ -32,6 +32,55 @@ message_box_style = """
 
 # The style will be applied when DCSettingsWindow is initialized
 
+# Style for the window's buttons; each button is picked out by its object name
+button_style = """
+    QPushButton {
+        padding: 10px 24px;
+        font-size: 14px;
+        border: none;
+        border-radius: 4px;
+        min-width: 120px;
+        margin: 0 5px;
+    }
+    QPushButton:hover {
+        opacity: 0.9;
+    }
+    QPushButton:pressed {
+        padding-top: 11px;
+        padding-bottom: 9px;
+    }
+    QPushButton#resetBtn {
+        background-color: #f0ad4e;
+        color: white;
+    }
+    QPushButton#resetBtn:hover {
+        background-color: #ec971f;
+    }
+    QPushButton#calculateBtn {
+        background-color: #5bc0de;
+        color: white;
+        font-weight: bold;
+    }
+    QPushButton#calculateBtn:hover {
+        background-color: #46b8da;
+    }
+    QPushButton#sendBtn {
+        background-color: #5cb85c;
+        color: white;
+        font-weight: bold;
+    }
+    QPushButton#sendBtn:hover {
+        background-color: #4cae4c;
+    }
+    QPushButton#closeBtn {
+        background-color: #f5f5f5;
+        border: 1px solid #ddd;
+    }
+    QPushButton#closeBtn:hover {
+        background-color: #e0e0e0;
+    }
+"""
+
 class DCSettingsWindow(QMdiSubWindow):
     """
     A subwindow for displaying and editing DC settings for channels.
@@ -45,9 +94,10 @@ class DCSettingsWindow(QMdiSubWindow):
         self.mqtt_handler = mqtt_handler
         self.setMinimumSize(900, 650)
         
-        # Apply the style to all QMessageBox instances
+        # Apply the style to all QMessageBox instances, unless the current app stylesheet
+        # already carries it (other windows may replace the app stylesheet wholesale)
         app = QApplication.instance()
-        if app:
+        if app and message_box_style not in app.styleSheet():
             app.setStyleSheet(app.styleSheet() + message_box_style)
         
         # Set the style for message boxes in this window
@@ -71,38 +121,18 @@ class DCSettingsWindow(QMdiSubWindow):
         # Create table
         self.create_table()
         
+        # Coalesce bursts of MQTT DC updates into at most one table refresh per interval
+        self._pending_dc = None
+        self.dc_update_timer = QTimer(self)
+        self.dc_update_timer.setSingleShot(True)
+        self.dc_update_timer.setInterval(50)
+        self.dc_update_timer.timeout.connect(self._flush_dc)
+        
         # Add buttons
         self.button_layout = QHBoxLayout()
         
-        # Style for buttons
-        button_style = """
-            QPushButton {
-                padding: 10px 24px;
-                font-size: 14px;
-                border: none;
-                border-radius: 4px;
-                min-width: 120px;
-                margin: 0 5px;
-            }
-            QPushButton:hover {
-                opacity: 0.9;
-            }
-            QPushButton:pressed {
-                padding-top: 11px;
-                padding-bottom: 9px;
-            }
-        """
-        
         self.reset_button = QPushButton("Reset")
-        self.reset_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #f0ad4e;
-                color: white;
-            }
-            QPushButton:hover {
-                background-color: #ec971f;
-            }
-        """)
+        self.reset_button.setObjectName("resetBtn")
         self.reset_button.clicked.connect(self.reset_values)
         self.button_layout.addWidget(self.reset_button)
         
@@ -110,48 +140,25 @@ class DCSettingsWindow(QMdiSubWindow):
         
         # Add Calculate button
         self.calculate_button = QPushButton("Calculate")
-        self.calculate_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #5bc0de;
-                color: white;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #46b8da;
-            }
-        """)
-        self.calculate_button.clicked.connect(self.calculate_ratio)
+        self.calculate_button.setObjectName("calculateBtn")
+        self.calculate_button.clicked.connect(lambda: self.calculate_ratio(force_update=True))
         self.button_layout.addWidget(self.calculate_button)
         
         self.send_button = QPushButton("Send Calibration")
-        self.send_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #5cb85c;
-                color: white;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #4cae4c;
-            }
-        """)
+        self.send_button.setObjectName("sendBtn")
         self.send_button.clicked.connect(self.send_calibration)
         self.button_layout.addWidget(self.send_button)
         
         self.close_button = QPushButton("Close")
-        self.close_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #f5f5f5;
-                border: 1px solid #ddd;
-            }
-            QPushButton:hover {
-                background-color: #e0e0e0;
-            }
-        """)
+        self.close_button.setObjectName("closeBtn")
         self.close_button.clicked.connect(self.close)
         self.button_layout.addWidget(self.close_button)
         
         self.layout.addLayout(self.button_layout)
         
+        # One shared stylesheet for all buttons, selected by object name
+        self.main_widget.setStyleSheet(button_style)
+        
         # Load initial values
         # self.load_initial_values()
         
@@ -168,12 +175,21 @@ class DCSettingsWindow(QMdiSubWindow):
         # Set row count based on channel count
         self.table.setRowCount(self.channel_count)
         
+        # Per-channel state and direct references to the row's widgets/items, indexed by row.
+        # "ratio" holds the ratio as last shown in the table.
+        self._channels = []
+        
         # Set column widths
         self.table.setColumnWidth(0, 150)  # Increased from 100
         self.table.setColumnWidth(1, 200)  # Increased from 150
         self.table.setColumnWidth(2, 200)  # Increased from 150
         self.table.setColumnWidth(3, 200)  # Increased from 150
         
+        # Suspend repaints, signals and sorting while the rows are populated
+        self.table.setUpdatesEnabled(False)
+        self.table.blockSignals(True)
+        self.table.setSortingEnabled(False)
+        
         # Populate channel numbers
         for i in range(self.channel_count):
             # Channel number
@@ -189,9 +205,6 @@ class DCSettingsWindow(QMdiSubWindow):
             self.table.setItem(i, 1, measured_item)
             
             # Actual DC (editable spinbox)
-            actual_widget = QWidget()
-            actual_layout = QHBoxLayout(actual_widget)
-            actual_layout.setContentsMargins(5, 2, 5, 2)  # Reduced margins for better fit
             actual_spinbox = QDoubleSpinBox()
             actual_spinbox.setRange(-1000.0, 1000.0)
             actual_spinbox.setDecimals(3)
@@ -206,6 +219,7 @@ class DCSettingsWindow(QMdiSubWindow):
                     min-width: 120px;
                     max-width: 180px;
                     height: 30px;
+                    margin: 0 15px;  /* Horizontal margin inside the cell */
                     border: 1px solid #ccc;
                     border-radius: 3px;
                     background: white;
@@ -231,17 +245,24 @@ class DCSettingsWindow(QMdiSubWindow):
             """)
             # Remove the automatic calculation on value change
             # actual_spinbox.valueChanged.connect(self.calculate_ratio)
-            actual_layout.addWidget(actual_spinbox)
-            actual_layout.setContentsMargins(15, 0, 15, 0)  # Add horizontal padding
-            actual_layout.setSpacing(0)
-            actual_widget.setLayout(actual_layout)
-            self.table.setCellWidget(i, 2, actual_widget)
+            self.table.setCellWidget(i, 2, actual_spinbox)
             
             # Ratio (read-only)
             ratio_item = QTableWidgetItem("1.000")
             ratio_item.setFlags(ratio_item.flags() & ~Qt.ItemIsEditable)
             ratio_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             self.table.setItem(i, 3, ratio_item)
+            
+            self._channels.append({
+                "measured": 0.0,
+                "actual_spin": actual_spinbox,
+                "ratio": 1.0,
+                "measured_item": measured_item,
+                "ratio_item": ratio_item,
+            })
+        
+        self.table.blockSignals(False)
+        self.table.setUpdatesEnabled(True)
         
         # Configure table properties
         header = self.table.horizontalHeader()
@@ -285,12 +306,15 @@ class DCSettingsWindow(QMdiSubWindow):
         
         Args:
             force_update: If True, will update the ratio column. If False, will only calculate without updating.
+        
+        Returns:
+            list: The ratio for each channel (None where it could not be calculated).
         """
-        for i in range(self.channel_count):
-            measured_text = self.table.item(i, 1).text()
+        ratios = []
+        for ch in self._channels:
             try:
-                measured = float(measured_text)
-                actual = self.table.cellWidget(i, 2).findChild(QDoubleSpinBox).value()
+                measured = ch["measured"]
+                actual = ch["actual_spin"].value()
                 
                 # Avoid division by zero
                 if abs(measured) > 1e-9:  # Small threshold to avoid division by very small numbers
@@ -300,26 +324,29 @@ class DCSettingsWindow(QMdiSubWindow):
                 
                 # Only update the ratio column if force_update is True
                 if force_update:
-                    ratio_item = self.table.item(i, 3)
+                    ratio_item = ch["ratio_item"]
                     if abs(ratio) < 1000:  # Prevent display of very large numbers
                         ratio_item.setText(f"{ratio:.6f}")
+                        ch["ratio"] = ratio
                     else:
                         ratio_item.setText("N/A")
+                        ch["ratio"] = 1.0
                 
-                return ratio
+                ratios.append(ratio)
                 
             except (ValueError, AttributeError) as e:
-                logging.error(f"Error calculating ratio: {e}")
-                return None
+                logging.error("Error calculating ratio: %s", e)
+                ratios.append(None)
+        
+        return ratios
     
     def reset_values(self):
         """Reset all input fields to zero and send reset command via MQTT."""
         # Reset UI values
-        for i in range(self.channel_count):
-            spinbox = self.table.cellWidget(i, 2).findChild(QDoubleSpinBox)
-            if spinbox:
-                spinbox.setValue(0.0)
-            self.table.item(i, 3).setText("1.000")
+        for ch in self._channels:
+            ch["actual_spin"].setValue(0.0)
+            ch["ratio_item"].setText("1.000")
+            ch["ratio"] = 1.0
         
         # Send reset command via MQTT
         if self.mqtt_handler:
@@ -329,7 +356,7 @@ class DCSettingsWindow(QMdiSubWindow):
                 self.mqtt_handler.publish("dccalibrated/data", reset_payload)
                 QMessageBox.information(self, "Success", "Calibration reset command sent successfully!")
             except Exception as e:
-                logging.error(f"Error sending reset command: {e}")
+                logging.error("Error sending reset command: %s", e)
                 QMessageBox.critical(self, "Error", f"Failed to send reset command: {e}")
         else:
             QMessageBox.warning(self, "Error", "MQTT handler not available")
@@ -341,35 +368,17 @@ class DCSettingsWindow(QMdiSubWindow):
             return
         
         try:
-            # Create a list to store ratio values
-            ratio_values = []
-            
-            for i in range(self.channel_count):
-                # Get the ratio value from the table
-                ratio_text = self.table.item(i, 3).text()
-                ratio = float(ratio_text) if ratio_text != "N/A" else 1.0
-                ratio_values.append(ratio)
-            
-            # Create a simple dictionary with just the ratio values
-            # payload = "$DC_CalibratedData:" + ", ".join(map(str, ratio_values)) + "#"
-            payload = "$DC_CalibratedData:" + ",".join(map(str, ratio_values)) + "#"
-
-
-
+            # Ratios are kept as floats by calculate_ratio, so no table round trip is needed
+            body = ",".join(format(ch["ratio"], '.6g') for ch in self._channels)
+            # Ratios are ASCII-only, so encode up front and hand paho ready-made bytes
+            payload = f"$DC_CalibratedData:{body}#".encode("ascii")
             
-            # Convert to JSON and publish
             self.mqtt_handler.publish("dccalibrated/data", payload)
             
             QMessageBox.information(self, "Success", "Calibration ratios sent successfully!")
             
         except Exception as e:
-            logging.error(f"Error sending calibration data: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to send calibration data: {e}")
-            
-            QMessageBox.information(self, "Success", "Calibration data sent successfully!")
-            
-        except Exception as e:
-            logging.error(f"Error sending calibration data: {e}")
+            logging.error("Error sending calibration data: %s", e)
             QMessageBox.critical(self, "Error", f"Failed to send calibration data: {e}")
     
     def update_measured_dc_values(self, dc_values):
@@ -380,29 +389,52 @@ class DCSettingsWindow(QMdiSubWindow):
         """
         if not dc_values or not isinstance(dc_values, list):
             return
-            
+        
+        # Coerce once here so the flush can use the values as-is
+        try:
+            dc_values = [float(v) for v in dc_values[:self.channel_count]]
+        except (TypeError, ValueError) as e:
+            logging.error("Invalid DC values received: %s", e)
+            return
+        
+        # Keep only the latest values; the timer applies them once it fires
+        self._pending_dc = dc_values
+        if not self.dc_update_timer.isActive():
+            self.dc_update_timer.start()
+    
+    def _flush_dc(self):
+        """Apply the most recent pending DC values to the table."""
+        dc_values = self._pending_dc
+        self._pending_dc = None
+        if dc_values is None:
+            return
+        
+        self.table.setUpdatesEnabled(False)
+        self.table.blockSignals(True)
         try:
-            for i, value in enumerate(dc_values[:self.channel_count]):
+            for i, (ch, measured) in enumerate(zip(self._channels, dc_values)):
                 try:
                     # Update measured DC value
-                    measured_item = self.table.item(i, 1)
-                    if measured_item:
-                        measured_item.setText(f"{float(value):.3f}")
+                    ch["measured"] = measured
+                    ch["measured_item"].setText(f"{measured:.3f}")
                     
                     # If actual DC is not set, initialize it with the measured value
-                    spinbox = self.table.cellWidget(i, 2).findChild(QDoubleSpinBox)
-                    if spinbox and abs(spinbox.value()) < 1e-9:  # Check if close to zero
-                        spinbox.setValue(float(value))
-                    
-                    # Recalculate ratio
-                    self.calculate_ratio()
+                    spinbox = ch["actual_spin"]
+                    if abs(spinbox.value()) < 1e-9:  # Check if close to zero
+                        spinbox.setValue(measured)
                     
                 except (ValueError, AttributeError) as e:
-                    logging.error(f"Error updating DC value for channel {i+1}: {e}")
+                    logging.error("Error updating DC value for channel %d: %s", i+1, e)
+            
+            # Recalculate ratios once for the whole update
+            self.calculate_ratio()
                     
         except Exception as e:
-            logging.error(f"Error in update_measured_dc_values: {e}")
+            logging.error("Error in update_measured_dc_values: %s", e)
             QMessageBox.warning(self, "Error", f"Failed to update DC values: {e}")
+        finally:
+            self.table.blockSignals(False)
+            self.table.setUpdatesEnabled(True)
     
     def save_settings(self):
         """Save the DC settings."""
@@ -411,28 +443,26 @@ class DCSettingsWindow(QMdiSubWindow):
             # For now, just show a success message
             QMessageBox.information(self, "Success", "DC settings saved successfully!")
         except Exception as e:
-            logging.error(f"Error saving DC settings: {str(e)}")
+            logging.error("Error saving DC settings: %s", e)
             QMessageBox.critical(self, "Error", f"Failed to save DC settings: {str(e)}")
     
     def get_dc_values(self):
         """Get the current DC values from the table."""
         values = {}
-        for i in range(self.channel_count):
-            channel = i + 1
+        for channel, ch in enumerate(self._channels, start=1):
             try:
-                measured = (self.table.item(i, 1).text())
-                actual = (self.table.item(i, 2).text())
-                values[channel] = {"measured": measured, "actual": actual}
+                values[channel] = {"measured": ch["measured"], "actual": ch["actual_spin"].value()}
             except (ValueError, AttributeError) as e:
-                logging.error(f"Error reading DC values for channel {channel}: {str(e)}")
+                logging.error("Error reading DC values for channel %d: %s", channel, e)
         return values
     
     def set_measured_dc(self, channel, value):
         """Set the measured DC value for a channel."""
         if 1 <= channel <= self.channel_count:
-            item = self.table.item(channel - 1, 1)
-            if item:
-                item.setText(f"{value:.3f}")
+            measured = float(value)
+            ch = self._channels[channel - 1]
+            ch["measured"] = measured
+            ch["measured_item"].setText(f"{measured:.3f}")
     
     def closeEvent(self, event):
         """Handle window close event."""
@@ -441,5 +471,5 @@ class DCSettingsWindow(QMdiSubWindow):
             self.closed.emit()
             super().closeEvent(event)
         except Exception as e:
-            logging.error(f"Error during closeEvent: {str(e)}")
+            logging.error("Error during closeEvent: %s", e)
             super().closeEvent(event)
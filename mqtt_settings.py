@@ -0,0 +1,81 @@
+"""
+Persistence for the MQTT broker settings (~/.sarayu/mqtt_settings.json).
+
+Kept free of Qt imports so the settings can be read without loading PyQt5.
+"""
+import json
+import logging
+import os
+
+# Location of the saved broker settings, resolved once at import
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".sarayu")
+SETTINGS_FILE = os.path.join(CONFIG_DIR, "mqtt_settings.json")
+
+# In-memory copy of the parsed settings file, invalidated when the file's
+# (mtime_ns, size, inode) changes; mtime alone can miss rewrites on coarse-timestamp filesystems
+_settings_cache = {"key": None, "data": None}
+
+
+def load_settings(default_host="", default_port=1883):
+    """
+    Load saved broker settings, reusing the cached copy while the file is unchanged.
+
+    Args:
+        default_host: Host returned when the settings file is missing or unreadable.
+        default_port: Port returned when the settings file is missing or unreadable.
+
+    Returns:
+        tuple: (broker_host, broker_port)
+    """
+    try:
+        st = os.stat(SETTINGS_FILE)
+    except OSError:
+        return default_host, default_port
+
+    key = (st.st_mtime_ns, st.st_size, st.st_ino)
+    if _settings_cache["key"] == key:
+        return _settings_cache["data"]
+
+    try:
+        with open(SETTINGS_FILE, 'r') as f:
+            settings = json.load(f)
+        data = (settings.get("broker_host", ""), settings.get("broker_port", 1883))
+        _settings_cache["key"] = key
+        _settings_cache["data"] = data
+        return data
+    except Exception as e:
+        logging.error("Error loading MQTT settings: %s", e)
+    return default_host, default_port
+
+
+def save_settings(broker_host, broker_port):
+    """
+    Write the broker settings atomically, skipping the write if the file already holds them.
+
+    The JSON is serialized once and written to a temporary file that is then
+    renamed over the settings file, so a crash never leaves a truncated file.
+    Raises OSError if the file cannot be written.
+    """
+    if load_settings() == (broker_host, broker_port):
+        return
+
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    payload = json.dumps({"broker_host": broker_host, "broker_port": broker_port}, indent=4).encode()
+    tmp_file = SETTINGS_FILE + ".tmp"
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            view = memoryview(payload)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_file, SETTINGS_FILE)
+    except BaseException:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
@@ -8,6 +8,7 @@ from datetime import datetime
 import threading
 import queue
 from collections import defaultdict
+import mqtt_settings
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -23,28 +24,13 @@ class MQTTHandler(QObject):
     @staticmethod
     def load_settings():
         """Load saved broker settings."""
-        try:
-            import os
-            import json
-            settings_file = os.path.join(os.path.expanduser("~"), ".sarayu", "mqtt_settings.json")
-            if os.path.exists(settings_file):
-                with open(settings_file, 'r') as f:
-                    settings = json.load(f)
-                    return settings.get("broker_host", ""), settings.get("broker_port", 1883)
-        except Exception as e:
-            print(f"Error loading MQTT settings: {e}")
-        return "192.168.1.231", 1883  # Default values
+        return mqtt_settings.load_settings(default_host="192.168.1.231", default_port=1883)
 
     @staticmethod
     def save_settings(broker_host, broker_port):
         """Save broker settings to config file."""
         try:
-            import os
-            import json
-            settings_file = os.path.join(os.path.expanduser("~"), ".sarayu", "mqtt_settings.json")
-            settings = {"broker_host": broker_host, "broker_port": broker_port}
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f)
+            mqtt_settings.save_settings(broker_host, broker_port)
         except Exception as e:
             print(f"Error saving MQTT settings: {e}")
 
@@ -479,7 +465,7 @@ class MQTTHandler(QObject):
         
         Args:
             topic (str): The topic to publish to
-            payload (str or dict): The message payload. If dict, will be converted to JSON
+            payload (str, bytes or dict): The message payload. If dict, will be converted to JSON
             qos (int): Quality of Service level (0, 1, or 2)
             retain (bool): Whether the message should be retained by the broker
             